@@ -1,17 +1,17 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import io
+import os
 import time
 from tsp_solver import (
     generate_cities, 
     precompute_distances,
-    solve_nn_all_starts,
-    solve_insertion_all_starts,
-    solve_ci_all_starts,
-    three_opt,
-    calculate_tour_distance
+    run_pipeline
 )
+from results_store import DEFAULT_DB_PATH, ResultsStore, instance_hash
+
+HISTORY_PAGE_SIZES = [10, 20, 50, 100]
+# Matriks jarak O(n²) hanya dibuat saat Run; di atas batas ini instance hanya divisualisasikan
+MAX_SOLVE_CITIES = 1000
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -42,13 +42,24 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Riwayat hasil persisten (dibagi oleh semua sesi)
+@st.cache_resource
+def get_results_store():
+    return ResultsStore(os.environ.get('TSP_RESULTS_DB', DEFAULT_DB_PATH))
+
+results_store = get_results_store()
+
 # Inisialisasi session state
 if 'cities_data' not in st.session_state:
     st.session_state.cities_data = None
-if 'results_history' not in st.session_state:
-    st.session_state.results_history = []
 if 'dist_matrix' not in st.session_state:
     st.session_state.dist_matrix = None
+if 'uploaded_key' not in st.session_state:
+    st.session_state.uploaded_key = None
+if 'city_arrays' not in st.session_state:
+    st.session_state.city_arrays = None
+if 'cities_hash' not in st.session_state:
+    st.session_state.cities_hash = None
 
 # Header
 st.markdown('<div class="main-header">🗺️ TSP Heuristic Optimizer</div>', unsafe_allow_html=True)
@@ -74,8 +85,10 @@ with st.sidebar:
         if st.button("🎲 Generate Cities", use_container_width=True):
             with st.spinner("Generating cities..."):
                 st.session_state.cities_data = generate_cities(num_cities, max_x, max_y)
-                cities_list = list(st.session_state.cities_data.keys())
-                st.session_state.dist_matrix = precompute_distances(cities_list, st.session_state.cities_data)
+                st.session_state.city_arrays = None
+                st.session_state.cities_hash = None
+                st.session_state.dist_matrix = None
+                st.session_state.uploaded_key = None
                 st.success(f"✅ {num_cities} kota berhasil di-generate!")
     
     else:
@@ -105,7 +118,8 @@ with st.sidebar:
             help="File harus memiliki kolom: city_id, x, y"
         )
         
-        if uploaded_file is not None:
+        # File yang sama tidak diproses ulang di setiap rerun
+        if uploaded_file is not None and st.session_state.uploaded_key != (uploaded_file.name, uploaded_file.size):
             try:
                 df = pd.read_csv(uploaded_file)
                 
@@ -115,16 +129,16 @@ with st.sidebar:
                     st.error(f"❌ File harus memiliki kolom: {', '.join(required_cols)}")
                 else:
                     # Konversi ke format yang dibutuhkan
-                    cities_data = {}
-                    for _, row in df.iterrows():
-                        cities_data[int(row['city_id'])] = {
-                            'X': float(row['x']),
-                            'Y': float(row['y'])
-                        }
+                    cities_data = {
+                        int(city_id): {'X': float(x), 'Y': float(y)}
+                        for city_id, x, y in zip(df['city_id'], df['x'], df['y'])
+                    }
                     
                     st.session_state.cities_data = cities_data
-                    cities_list = list(cities_data.keys())
-                    st.session_state.dist_matrix = precompute_distances(cities_list, cities_data)
+                    st.session_state.city_arrays = None
+                    st.session_state.cities_hash = None
+                    st.session_state.dist_matrix = None
+                    st.session_state.uploaded_key = (uploaded_file.name, uploaded_file.size)
                     st.success(f"✅ {len(cities_data)} kota berhasil di-upload!")
             
             except Exception as e:
@@ -132,6 +146,30 @@ with st.sidebar:
     
     st.markdown("---")
     
+    # Opsi visualisasi (zoom + downsampling) untuk instance besar
+    viewport = None
+    max_points = None
+    if st.session_state.cities_data is not None:
+        # numpy/plotly hanya di-import saat ada data yang perlu divisualisasikan
+        import visualization as viz
+        
+        if st.session_state.city_arrays is None:
+            st.session_state.city_arrays = viz.cities_to_arrays(st.session_state.cities_data)
+        ids, xs, ys = st.session_state.city_arrays
+        max_points = viz.DEFAULT_MAX_POINTS
+        
+        if len(ids) > viz.WEBGL_THRESHOLD:
+            st.subheader("🔍 Visualisasi Instance Besar")
+            max_points = st.slider("Maks. Titik Ditampilkan:", 1000, 100000, viz.DEFAULT_MAX_POINTS, step=1000)
+            x_min, x_max = float(xs.min()), float(xs.max())
+            y_min, y_max = float(ys.min()), float(ys.max())
+            if x_min < x_max and y_min < y_max:
+                x_range = st.slider("Zoom X:", x_min, x_max, (x_min, x_max))
+                y_range = st.slider("Zoom Y:", y_min, y_max, (y_min, y_max))
+                if x_range != (x_min, x_max) or y_range != (y_min, y_max):
+                    viewport = (x_range, y_range)
+            st.markdown("---")
+    
     # Pilihan Metode Heuristik
     st.subheader("🔧 Pilih Metode Heuristik")
     
@@ -163,6 +201,9 @@ with st.sidebar:
 if st.session_state.cities_data is None:
     st.info("👈 Silakan generate atau upload data kota terlebih dahulu dari sidebar")
 else:
+    # Plotly hanya di-import saat ada data yang perlu divisualisasikan
+    import plotly.graph_objects as go
+    
     # Display current cities
     col1, col2 = st.columns([2, 1])
     
@@ -170,29 +211,8 @@ else:
         st.subheader("📍 Visualisasi Kota")
         
         # Plot cities
-        cities_df = pd.DataFrame([
-            {'id': k, 'x': v['X'], 'y': v['Y']} 
-            for k, v in st.session_state.cities_data.items()
-        ])
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=cities_df['x'],
-            y=cities_df['y'],
-            mode='markers+text',
-            marker=dict(size=12, color='red'),
-            text=cities_df['id'],
-            textposition='top center',
-            name='Cities'
-        ))
-        
-        fig.update_layout(
-            title="Posisi Kota",
-            xaxis_title="X Coordinate",
-            yaxis_title="Y Coordinate",
-            hovermode='closest',
-            height=400
-        )
+        cities_df = pd.DataFrame({'id': ids, 'x': xs, 'y': ys})
+        fig = viz.build_cities_figure(ids, xs, ys, max_points=max_points, viewport=viewport)
         
         st.plotly_chart(fig, use_container_width=True)
     
@@ -210,6 +230,11 @@ if run_button and st.session_state.cities_data is not None:
     
     if not selected_methods:
         st.error("❌ Pilih minimal satu metode heuristik!")
+    elif len(st.session_state.cities_data) > MAX_SOLVE_CITIES:
+        st.error(
+            f"❌ Optimasi di aplikasi dibatasi {MAX_SOLVE_CITIES} kota "
+            f"(data ini {len(st.session_state.cities_data):,} kota). Instance besar hanya divisualisasikan."
+        )
     else:
         st.markdown("---")
         st.subheader("🔄 Proses Optimasi")
@@ -218,51 +243,17 @@ if run_button and st.session_state.cities_data is not None:
         status_text = st.empty()
         
         cities_list = list(st.session_state.cities_data.keys())
+        if st.session_state.dist_matrix is None:
+            status_text.text("⏳ Menghitung matriks jarak...")
+            st.session_state.dist_matrix = precompute_distances(cities_list, st.session_state.cities_data)
         dist_matrix = st.session_state.dist_matrix
         
         results = []
         total_methods = len(selected_methods)
         
         for idx, method in enumerate(selected_methods):
-            status_text.text(f"⏳ Running {method}...")
-            start_time = time.time()
-            
-            # Run construction heuristic
-            if method == 'Nearest Neighbor':
-                tour, distance = solve_nn_all_starts(cities_list, dist_matrix)
-            elif method == 'Nearest Insertion':
-                tour, distance = solve_insertion_all_starts(cities_list, dist_matrix, 'nearest')
-            elif method == 'Farthest Insertion':
-                tour, distance = solve_insertion_all_starts(cities_list, dist_matrix, 'farthest')
-            elif method == 'Cheapest Insertion':
-                tour, distance = solve_ci_all_starts(cities_list, dist_matrix)
-            elif method == 'Arbitrary Insertion':
-                tour, distance = solve_insertion_all_starts(cities_list, dist_matrix, 'arbitrary', num_runs=ai_runs)
-            
-            construction_time = time.time() - start_time
-            initial_distance = distance
-            
-            # Run 3-Opt if enabled
-            if use_3opt:
-                status_text.text(f"⏳ Running 3-Opt on {method}...")
-                start_opt = time.time()
-                tour, distance = three_opt(tour, dist_matrix)
-                opt_time = time.time() - start_opt
-            else:
-                opt_time = 0
-            
-            improvement = ((initial_distance - distance) / initial_distance * 100) if use_3opt else 0
-            
-            results.append({
-                'Method': method,
-                'Initial Distance': round(initial_distance, 2),
-                'Final Distance': round(distance, 2),
-                'Improvement (%)': round(improvement, 2),
-                'Construction Time (s)': round(construction_time, 3),
-                '3-Opt Time (s)': round(opt_time, 3),
-                'Total Time (s)': round(construction_time + opt_time, 3),
-                'Tour': tour
-            })
+            status_text.text(f"⏳ Running {method}{' + 3-Opt' if use_3opt else ''}...")
+            results.append(run_pipeline(method, cities_list, dist_matrix, use_3opt=use_3opt, ai_runs=ai_runs))
             
             progress_bar.progress((idx + 1) / total_methods)
         
@@ -272,12 +263,18 @@ if run_button and st.session_state.cities_data is not None:
         progress_bar.empty()
         
         # Save to history
-        st.session_state.results_history.append({
-            'timestamp': pd.Timestamp.now(),
-            'num_cities': len(cities_list),
-            'use_3opt': use_3opt,
-            'results': results
-        })
+        if st.session_state.cities_hash is None:
+            st.session_state.cities_hash = instance_hash(st.session_state.cities_data)
+        try:
+            results_store.record_run(
+                st.session_state.cities_hash,
+                len(cities_list),
+                use_3opt,
+                results,
+                params={'methods': selected_methods, 'ai_runs': ai_runs, 'source': 'app'}
+            )
+        except Exception as e:
+            st.warning(f"⚠️ Hasil tidak tersimpan ke riwayat: {str(e)}")
         
         # Display results
         st.markdown("---")
@@ -308,47 +305,11 @@ if run_button and st.session_state.cities_data is not None:
         col3.metric("Total Waktu", f"{best_result['Total Time (s)']:.3f}s")
         
         # Plot best tour
-        tour_coords = [st.session_state.cities_data[city_id] for city_id in best_tour]
-        tour_coords.append(tour_coords[0])  # Close the loop
-        
-        fig = go.Figure()
-        
-        # Plot route lines
-        fig.add_trace(go.Scatter(
-            x=[c['X'] for c in tour_coords],
-            y=[c['Y'] for c in tour_coords],
-            mode='lines',
-            line=dict(color='blue', width=2),
-            name='Route'
-        ))
-        
-        # Plot cities
-        fig.add_trace(go.Scatter(
-            x=[c['X'] for c in tour_coords[:-1]],
-            y=[c['Y'] for c in tour_coords[:-1]],
-            mode='markers+text',
-            marker=dict(size=12, color='red'),
-            text=best_tour,
-            textposition='top center',
-            name='Cities'
-        ))
-        
-        # Highlight start city
-        start_city = st.session_state.cities_data[best_tour[0]]
-        fig.add_trace(go.Scatter(
-            x=[start_city['X']],
-            y=[start_city['Y']],
-            mode='markers',
-            marker=dict(size=20, color='green', symbol='star'),
-            name='Start/End'
-        ))
-        
-        fig.update_layout(
+        fig = viz.build_tour_figure(
+            best_tour, ids, xs, ys,
             title=f"Rute Terbaik: {best_result['Method']} (Distance: {best_result['Final Distance']:.2f})",
-            xaxis_title="X Coordinate",
-            yaxis_title="Y Coordinate",
-            hovermode='closest',
-            height=500
+            max_points=max_points,
+            viewport=viewport
         )
         
         st.plotly_chart(fig, use_container_width=True)
@@ -389,26 +350,73 @@ if run_button and st.session_state.cities_data is not None:
         st.plotly_chart(fig_compare, use_container_width=True)
 
 # History section
-if st.session_state.results_history:
+total_runs = results_store.count_runs()
+if total_runs:
     st.markdown("---")
     st.subheader("📜 Riwayat Hasil")
     
     with st.expander("Lihat Riwayat Lengkap"):
-        for i, history in enumerate(reversed(st.session_state.results_history)):
-            st.markdown(f"**Run #{len(st.session_state.results_history) - i}** - {history['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}")
-            st.markdown(f"- Jumlah Kota: {history['num_cities']}")
-            st.markdown(f"- Menggunakan 3-Opt: {'Ya' if history['use_3opt'] else 'Tidak'}")
-            
-            hist_df = pd.DataFrame([
-                {k: v for k, v in r.items() if k != 'Tour'}
-                for r in history['results']
-            ])
+        col1, col2 = st.columns(2)
+        page_size = col1.selectbox("Run per Halaman:", HISTORY_PAGE_SIZES, index=1)
+        num_pages = (total_runs + page_size - 1) // page_size
+        page = col2.number_input(f"Halaman (1-{num_pages}):", 1, num_pages, 1)
+        
+        # Hanya ringkasan satu halaman yang dibaca dari store
+        runs = results_store.list_runs(limit=page_size, offset=(page - 1) * page_size)
+        runs_df = pd.DataFrame([
+            {k: v for k, v in run.items() if k != 'Params'}
+            for run in runs
+        ])
+        st.dataframe(runs_df, use_container_width=True, hide_index=True)
+        
+        # Detail per metode hanya dimuat untuk run yang dipilih
+        run_ids = [run['Run ID'] for run in runs]
+        selected_run = st.selectbox("Lihat Detail Run:", [None] + run_ids,
+                                    format_func=lambda r: "-" if r is None else f"Run #{r}")
+        if selected_run is not None:
+            run = runs[run_ids.index(selected_run)]
+            st.markdown(f"**Run #{run['Run ID']}** - {run['Timestamp']}")
+            st.markdown(f"- Jumlah Kota: {run['Num Cities']}")
+            st.markdown(f"- Menggunakan 3-Opt: {'Ya' if run['Use 3-Opt'] else 'Tidak'}")
+            st.markdown(f"- Instance Hash: `{run['Instance Hash']}`")
+            hist_df = pd.DataFrame(results_store.get_results(selected_run))
             st.dataframe(hist_df, use_container_width=True)
-            st.markdown("---")
+            
+            # Tur dibaca dari store hanya jika instance yang sedang dimuat sama dengan instance run ini
+            if st.session_state.cities_data is not None and st.session_state.cities_hash is None:
+                st.session_state.cities_hash = instance_hash(st.session_state.cities_data)
+            if st.session_state.cities_hash != run['Instance Hash']:
+                st.caption("Muat instance yang sama (upload/generate) untuk menampilkan rute run ini.")
+            elif not hist_df.empty:
+                tour_method = st.selectbox("Metode:", hist_df['Method'].tolist(), key='history_tour_method')
+                if st.checkbox("🗺️ Tampilkan Rute", key='history_show_tour'):
+                    tour = results_store.get_tour(selected_run, tour_method)
+                    fig = viz.build_tour_figure(
+                        tour, ids, xs, ys,
+                        title=f"Run #{selected_run}: {tour_method}",
+                        max_points=max_points,
+                        viewport=viewport
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
     
-    if st.button("🗑️ Clear History"):
-        st.session_state.results_history = []
-        st.rerun()
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("📤 Siapkan Export CSV"):
+            st.session_state.history_csv = results_store.export_csv()
+        if st.session_state.get('history_csv'):
+            st.download_button(
+                label="📥 Download Riwayat CSV",
+                data=st.session_state.history_csv,
+                file_name="tsp_results_history.csv",
+                mime="text/csv"
+            )
+    with col2:
+        # Hanya run dari aplikasi yang dihapus; run batch_runner tetap tersimpan
+        confirm_clear = st.checkbox("Ya, hapus semua riwayat run dari aplikasi (tidak bisa dibatalkan)")
+        if st.button("🗑️ Clear History", disabled=not confirm_clear):
+            results_store.clear(source='app')
+            st.session_state.history_csv = None
+            st.rerun()
 
 # Footer
 st.markdown("---")
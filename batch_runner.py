@@ -0,0 +1,381 @@
+"""
+TSP Batch Runner
+Menjalankan pipeline heuristik (konstruksi + 3-Opt) untuk banyak instance sekaligus
+tanpa UI Streamlit. Hasil ditulis sebagai JSONL (satu baris per instance).
+
+Contoh:
+    python batch_runner.py data/ -o hasil.jsonl -m "Cheapest Insertion" --workers 4
+    cat instances.jsonl | python batch_runner.py - -o hasil.jsonl --checkpoint hasil.ckpt
+"""
+
+import csv
+import json
+import os
+import sys
+
+from results_store import instance_hash
+from tsp_solver import (
+    CONSTRUCTION_METHODS,
+    precompute_distances,
+    run_pipeline,
+    validate_cities_data
+)
+
+SUPPORTED_EXTENSIONS = ('.csv', '.tsp', '.jsonl')
+# Berapa kali sebuah instance dicoba jika proses worker mati (misalnya OOM)
+MAX_ATTEMPTS = 2
+
+class InstanceReadError(Exception):
+    """Instance tidak bisa dibaca; dihasilkan iter_instances sebagai pengganti cities_data."""
+
+# --- 1. Pembaca Instance ---
+
+def read_csv_instance(path):
+    """Membaca instance dari CSV dengan kolom city_id, x, y (format yang sama dengan app)."""
+    cities_data = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            cities_data[int(row['city_id'])] = {
+                'X': float(row['x']),
+                'Y': float(row['y'])
+            }
+    return cities_data
+
+def read_tsplib_instance(path):
+    """
+    Membaca instance TSPLIB (bagian NODE_COORD_SECTION). Hanya EDGE_WEIGHT_TYPE EUC_2D
+    yang didukung; tipe lain (GEO, ATT, CEIL_2D, ...) memakai metrik berbeda sehingga ditolak.
+    Jarak dihitung sebagai Euclidean tanpa pembulatan nint ala TSPLIB.
+    """
+    cities_data = {}
+    edge_weight_type = None
+    in_coords = False
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('NODE_COORD_SECTION'):
+                if edge_weight_type != 'EUC_2D':
+                    raise ValueError(f"EDGE_WEIGHT_TYPE {edge_weight_type} tidak didukung (hanya EUC_2D)")
+                in_coords = True
+                continue
+            if line == 'EOF':
+                break
+            if in_coords:
+                parts = line.split()
+                if len(parts) < 3:
+                    break
+                cities_data[int(parts[0])] = {
+                    'X': float(parts[1]),
+                    'Y': float(parts[2])
+                }
+            elif ':' in line:
+                key, value = line.split(':', 1)
+                if key.strip() == 'EDGE_WEIGHT_TYPE':
+                    edge_weight_type = value.strip()
+    if not in_coords:
+        raise ValueError("File TSPLIB tidak memiliki NODE_COORD_SECTION")
+    return cities_data
+
+def parse_jsonl_record(record):
+    """
+    Mengubah satu record JSON menjadi format cities_data.
+    Field 'cities' boleh berupa {"id": {"X": .., "Y": ..}} atau [[id, x, y], ...].
+    """
+    cities = record['cities']
+    cities_data = {}
+    if isinstance(cities, dict):
+        for city_id, coords in cities.items():
+            cities_data[int(city_id)] = {
+                'X': float(coords['X']),
+                'Y': float(coords['Y'])
+            }
+    else:
+        for city_id, x, y in cities:
+            cities_data[int(city_id)] = {'X': float(x), 'Y': float(y)}
+    return cities_data
+
+def iter_jsonl_instances(lines, source_name):
+    """
+    Generator (id, cities_data) dari baris-baris JSONL. Baris yang tidak valid
+    menghasilkan (id, InstanceReadError) agar batch tetap berjalan.
+    """
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        instance_id = f"{source_name}:{line_no}"
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Record JSONL harus berupa objek JSON")
+            instance_id = str(record.get('id', instance_id))
+            cities_data = parse_jsonl_record(record)
+        except Exception as e:
+            yield instance_id, InstanceReadError(f"Gagal membaca instance: {e!r}")
+            continue
+        yield instance_id, cities_data
+
+def _read_file_instance(reader, path):
+    try:
+        return reader(path)
+    except Exception as e:
+        return InstanceReadError(f"Gagal membaca instance: {e!r}")
+
+def iter_instances(source):
+    """
+    Generator (id, cities_data) dari sebuah direktori, file tunggal, atau '-' (stdin JSONL).
+    Instance dibaca satu per satu sehingga memori tidak bergantung pada ukuran batch.
+    Instance yang gagal dibaca menghasilkan InstanceReadError sebagai cities_data.
+    """
+    if source == '-':
+        yield from iter_jsonl_instances(sys.stdin, 'stdin')
+        return
+
+    if os.path.isdir(source):
+        paths = sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(SUPPORTED_EXTENSIONS)
+        )
+    else:
+        paths = [source]
+
+    for path in paths:
+        name = os.path.basename(path)
+        ext = os.path.splitext(name)[1].lower()
+        if ext == '.jsonl':
+            try:
+                f = open(path)
+            except OSError as e:
+                yield name, InstanceReadError(f"Gagal membaca instance: {e!r}")
+                continue
+            with f:
+                yield from iter_jsonl_instances(f, name)
+        elif ext == '.tsp':
+            yield name, _read_file_instance(read_tsplib_instance, path)
+        elif ext == '.csv':
+            yield name, _read_file_instance(read_csv_instance, path)
+        else:
+            yield name, InstanceReadError(f"Format file tidak didukung: {path}")
+
+# --- 2. Eksekusi ---
+
+def solve_instance(instance_id, cities_data, methods, use_3opt=True, ai_runs=5):
+    """Menjalankan semua metode pada satu instance dan mengembalikan record hasil."""
+    is_valid, message = validate_cities_data(cities_data)
+    if not is_valid:
+        return {'id': instance_id, 'error': message}
+    if len(cities_data) < 2:
+        return {'id': instance_id, 'error': "Instance minimal harus memiliki 2 kota"}
+
+    cities_list = list(cities_data.keys())
+    dist_matrix = precompute_distances(cities_list, cities_data)
+
+    results = [
+        run_pipeline(method, cities_list, dist_matrix, use_3opt=use_3opt, ai_runs=ai_runs)
+        for method in methods
+    ]
+    best_result = min(results, key=lambda x: x['Final Distance'])
+
+    return {
+        'id': instance_id,
+        'instance_hash': instance_hash(cities_data),
+        'num_cities': len(cities_list),
+        'use_3opt': use_3opt,
+        'best_method': best_result['Method'],
+        'best_distance': best_result['Final Distance'],
+        'results': results
+    }
+
+def _solve_instance_safe(instance_id, cities_data, methods, use_3opt, ai_runs):
+    """Seperti solve_instance, tetapi error dikembalikan sebagai record (untuk worker pool)."""
+    try:
+        return solve_instance(instance_id, cities_data, methods, use_3opt, ai_runs)
+    except Exception as e:
+        return {'id': instance_id, 'error': str(e)}
+
+def load_checkpoint(checkpoint_path):
+    """Membaca ID instance yang sudah selesai dari file checkpoint."""
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return set()
+    with open(checkpoint_path) as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+def run_batch(instances, methods, use_3opt=True, ai_runs=5, workers=None,
+              max_in_flight=None, completed_ids=None):
+    """
+    Menjalankan batch instance di process pool dan menghasilkan record hasil
+    sesuai urutan selesai. Jumlah instance yang sedang diproses dibatasi
+    max_in_flight agar memori tetap terbatas. Instance yang ID-nya ada di
+    completed_ids dilewati (untuk resume dari checkpoint). Checkpoint dicatat per ID,
+    jadi ID harus unik di seluruh batch: kemunculan berikutnya dari ID yang sama
+    menjadi record error alih-alih diselesaikan.
+
+    Instance yang gagal dibaca atau gagal diselesaikan menjadi record
+    {'id': ..., 'error': ...} dan batch tetap berlanjut. Jika proses worker mati,
+    pool dibuat ulang dan instance yang terdampak dicoba lagi (maksimal MAX_ATTEMPTS kali).
+    """
+    # Di-import di sini agar worker yang hanya memakai solve_instance tetap cepat start
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, ALL_COMPLETED, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    if not isinstance(methods, (list, tuple)) or not methods:
+        raise ValueError("methods harus berupa daftar metode yang tidak kosong")
+    for method in methods:
+        if method not in CONSTRUCTION_METHODS:
+            raise ValueError(f"Metode tidak dikenal: {method}")
+    if ai_runs < 1:
+        raise ValueError("ai_runs minimal 1")
+    if workers is not None and workers < 1:
+        raise ValueError("workers minimal 1")
+    if max_in_flight is not None and max_in_flight < 1:
+        raise ValueError("max_in_flight minimal 1")
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    completed_ids = completed_ids or set()
+    seen_ids = set()
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    # future -> (instance_id, cities_data, attempt)
+    pending = {}
+
+    def submit(instance_id, cities_data, attempt):
+        nonlocal executor
+        args = (_solve_instance_safe, instance_id, cities_data, methods, use_3opt, ai_runs)
+        try:
+            future = executor.submit(*args)
+        except BrokenProcessPool:
+            executor.shutdown(wait=False)
+            executor = ProcessPoolExecutor(max_workers=workers)
+            future = executor.submit(*args)
+        pending[future] = (instance_id, cities_data, attempt)
+
+    def collect(return_when):
+        nonlocal executor
+        done, _ = wait(pending, return_when=return_when)
+        if any(isinstance(f.exception(), BrokenProcessPool) for f in done):
+            # Pool yang rusak menggagalkan semua future-nya; kumpulkan semuanya sekaligus
+            done, _ = wait(pending, return_when=ALL_COMPLETED)
+        retry = []
+        for future in done:
+            instance_id, cities_data, attempt = pending.pop(future)
+            error = future.exception()
+            if error is None:
+                yield future.result()
+            elif isinstance(error, BrokenProcessPool) and attempt < MAX_ATTEMPTS:
+                retry.append((instance_id, cities_data, attempt + 1))
+            else:
+                yield {'id': instance_id, 'error': f"Worker gagal: {error!r}"}
+        if retry:
+            executor.shutdown(wait=False)
+            executor = ProcessPoolExecutor(max_workers=workers)
+            for item in retry:
+                submit(*item)
+
+    try:
+        for instance_id, cities_data in instances:
+            if instance_id in completed_ids:
+                seen_ids.add(instance_id)
+                continue
+            if instance_id in seen_ids:
+                yield {'id': instance_id, 'error': f"ID instance duplikat: {instance_id}"}
+                continue
+            seen_ids.add(instance_id)
+            if isinstance(cities_data, InstanceReadError):
+                yield {'id': instance_id, 'error': str(cities_data)}
+                continue
+            while len(pending) >= max_in_flight:
+                yield from collect(FIRST_COMPLETED)
+            submit(instance_id, cities_data, 1)
+
+        while pending:
+            yield from collect(FIRST_COMPLETED)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def run_batch_to_jsonl(source, output_path, methods, use_3opt=True, ai_runs=5,
+                       workers=None, max_in_flight=None, checkpoint_path=None, store_path=None):
+    """
+    Menjalankan batch dari source dan menulis hasilnya ke output_path (JSONL, '-' untuk stdout).
+    Jika checkpoint_path diberikan, ID yang selesai dicatat di sana dan run berikutnya
+    melanjutkan dari instance yang belum selesai. Jika store_path diberikan, hasil juga
+    dicatat ke riwayat SQLite (results_store). Mengembalikan jumlah instance yang diproses.
+    """
+    completed_ids = load_checkpoint(checkpoint_path)
+    mode = 'a' if completed_ids else 'w'
+
+    out = sys.stdout if output_path == '-' else open(output_path, mode)
+    checkpoint = open(checkpoint_path, 'a') if checkpoint_path else None
+    store = None
+    if store_path:
+        from results_store import ResultsStore
+        store = ResultsStore(store_path)
+    params = {'methods': methods, 'ai_runs': ai_runs, 'source': 'batch_runner'}
+    count = 0
+    try:
+        for record in run_batch(iter_instances(source), methods, use_3opt, ai_runs,
+                                workers, max_in_flight, completed_ids):
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            # Checkpoint ditulis tepat setelah baris output agar resume tidak menduplikasi hasil
+            if checkpoint:
+                checkpoint.write(record['id'] + '\n')
+                checkpoint.flush()
+            count += 1
+            if store and 'error' not in record:
+                # Riwayat bersifat tambahan: kegagalan store tidak menghentikan batch
+                try:
+                    store.record_run(record['instance_hash'], record['num_cities'], use_3opt,
+                                     record['results'], params=dict(params, id=record['id']))
+                except Exception as e:
+                    print(f"Gagal mencatat {record['id']} ke riwayat: {e}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if checkpoint:
+            checkpoint.close()
+        if store:
+            store.close()
+    return count
+
+# --- 3. CLI ---
+
+def main(argv=None):
+    import argparse
+
+    def positive_int(value):
+        if not value.isdigit() or int(value) < 1:
+            raise argparse.ArgumentTypeError(f"harus bilangan bulat >= 1, bukan {value!r}")
+        return int(value)
+
+    parser = argparse.ArgumentParser(description="Batch solver TSP tanpa UI Streamlit")
+    parser.add_argument('source', help="Direktori/file instance (.csv, .tsp, .jsonl) atau '-' untuk JSONL dari stdin")
+    parser.add_argument('-o', '--output', default='-', help="File output JSONL ('-' untuk stdout)")
+    parser.add_argument('-m', '--method', action='append', choices=list(CONSTRUCTION_METHODS),
+                        help="Metode konstruksi (bisa diulang, default: Cheapest Insertion)")
+    parser.add_argument('--no-3opt', action='store_true', help="Lewati perbaikan 3-Opt")
+    parser.add_argument('--ai-runs', type=positive_int, default=5, help="Jumlah run Arbitrary Insertion per titik awal")
+    parser.add_argument('--workers', type=positive_int, default=None, help="Jumlah proses worker (default: jumlah CPU)")
+    parser.add_argument('--max-in-flight', type=positive_int, default=None,
+                        help="Maksimum instance yang diproses bersamaan (default: 2 x workers)")
+    parser.add_argument('--checkpoint', default=None, help="File checkpoint untuk resume")
+    parser.add_argument('--store', default=None, help="File SQLite riwayat hasil (lihat results_store.py)")
+    args = parser.parse_args(argv)
+
+    methods = args.method or ['Cheapest Insertion']
+    count = run_batch_to_jsonl(
+        args.source, args.output, methods,
+        use_3opt=not args.no_3opt,
+        ai_runs=args.ai_runs,
+        workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        checkpoint_path=args.checkpoint,
+        store_path=args.store
+    )
+    print(f"{count} instance selesai diproses", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Benchmark Waktu Import
+Mengukur waktu startup modul solver di proses Python baru (seperti worker batch
+yang berumur pendek) dan memastikan tidak ada dependency berat yang ikut ter-import.
+
+Contoh:
+    python bench_import.py
+    python bench_import.py --repeat 20 tsp_solver batch_runner
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ['tsp_solver', 'batch_runner', 'solve_service', 'results_store']
+HEAVY_MODULES = ['pandas', 'plotly', 'streamlit', 'numpy']
+
+# Dijalankan di proses baru: mengukur import lalu melaporkan modul berat yang termuat
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{'import_ms': elapsed * 1000, 'heavy': heavy}}))
+"""
+
+def measure_import(module, repeat=10):
+    """Mengukur waktu import sebuah modul (ms) di proses baru sebanyak repeat kali."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    times = []
+    heavy = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=here, capture_output=True, text=True, check=True
+        ).stdout
+        sample = json.loads(output)
+        times.append(sample['import_ms'])
+        heavy = sample['heavy']
+    return {
+        'module': module,
+        'median_ms': round(statistics.median(times), 2),
+        'min_ms': round(min(times), 2),
+        'max_ms': round(max(times), 2),
+        'heavy_imports': heavy
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark waktu import modul solver")
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--repeat', type=int, default=10, help="Jumlah proses per modul")
+    args = parser.parse_args(argv)
+
+    print(f"{'Module':<16}{'Median (ms)':>12}{'Min (ms)':>10}{'Max (ms)':>10}  Heavy imports")
+    failed = False
+    for module in args.modules:
+        result = measure_import(module, args.repeat)
+        heavy = ', '.join(result['heavy_imports']) or '-'
+        print(f"{module:<16}{result['median_ms']:>12}{result['min_ms']:>10}{result['max_ms']:>10}  {heavy}")
+        failed = failed or bool(result['heavy_imports'])
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
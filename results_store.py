@@ -0,0 +1,242 @@
+"""
+TSP Results Store
+Penyimpanan riwayat hasil optimasi yang persisten (SQLite). Setiap run mencatat hash
+instance, parameter, dan hasil per metode; tur disimpan sebagai blob biner ringkas dan
+hanya dibaca saat dibutuhkan.
+"""
+
+import hashlib
+import json
+import struct
+import sys
+import threading
+from array import array
+from datetime import datetime
+
+DEFAULT_DB_PATH = 'results_history.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    instance_hash TEXT NOT NULL,
+    num_cities INTEGER NOT NULL,
+    use_3opt INTEGER NOT NULL,
+    params TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_instance_hash ON runs (instance_hash);
+
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    method TEXT NOT NULL,
+    initial_distance REAL NOT NULL,
+    final_distance REAL NOT NULL,
+    improvement REAL NOT NULL,
+    construction_time REAL NOT NULL,
+    opt_time REAL NOT NULL,
+    total_time REAL NOT NULL,
+    tour BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_run_id ON results (run_id);
+"""
+
+# Kolom tabel results <-> key dictionary hasil run_pipeline
+RESULT_COLUMNS = [
+    ('method', 'Method'),
+    ('initial_distance', 'Initial Distance'),
+    ('final_distance', 'Final Distance'),
+    ('improvement', 'Improvement (%)'),
+    ('construction_time', 'Construction Time (s)'),
+    ('opt_time', '3-Opt Time (s)'),
+    ('total_time', 'Total Time (s)')
+]
+
+EXPORT_HEADER = ['Run ID', 'Timestamp', 'Instance Hash', 'Num Cities', 'Use 3-Opt'] + [key for _, key in RESULT_COLUMNS]
+
+# --- 1. Helper ---
+
+def instance_hash(cities_data):
+    """Hash SHA-1 dari koordinat kota (urut berdasarkan ID), untuk mengenali instance yang sama."""
+    digest = hashlib.sha1()
+    for city_id in sorted(cities_data):
+        coords = cities_data[city_id]
+        digest.update(struct.pack('<qdd', int(city_id), float(coords['X']), float(coords['Y'])))
+    return digest.hexdigest()
+
+def encode_tour(tour):
+    """Encode tur (daftar ID kota) menjadi blob int64 little-endian, sama seperti instance_hash."""
+    data = array('q', tour)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+def decode_tour(blob):
+    """Kebalikan dari encode_tour."""
+    data = array('q')
+    data.frombytes(blob)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tolist()
+
+# --- 2. Store ---
+
+class ResultsStore:
+    """
+    Riwayat hasil di SQLite. Satu koneksi dipakai bersama oleh semua thread
+    (misalnya sesi Streamlit) dan dilindungi lock.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        # sqlite3 di-import di sini agar worker yang hanya memakai instance_hash tetap cepat start
+        import sqlite3
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute('PRAGMA foreign_keys = ON')
+            if path != ':memory:':
+                self.conn.execute('PRAGMA journal_mode = WAL')
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def record_run(self, instance_hash, num_cities, use_3opt, results, params=None, created_at=None):
+        """Menyimpan satu run beserta hasil tiap metode. Mengembalikan ID run."""
+        created_at = created_at or datetime.now().isoformat(timespec='seconds')
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO runs (created_at, instance_hash, num_cities, use_3opt, params) VALUES (?, ?, ?, ?, ?)',
+                (created_at, instance_hash, num_cities, int(use_3opt), json.dumps(params or {}))
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                f"INSERT INTO results (run_id, {', '.join(col for col, _ in RESULT_COLUMNS)}, tour) "
+                f"VALUES (?, {', '.join('?' for _ in RESULT_COLUMNS)}, ?)",
+                [
+                    (run_id, *(r[key] for _, key in RESULT_COLUMNS), encode_tour(r['Tour']))
+                    for r in results
+                ]
+            )
+        return run_id
+
+    def count_runs(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+
+    def list_runs(self, limit=20, offset=0):
+        """
+        Daftar run terbaru (satu halaman), tanpa tur. Setiap item berisi ringkasan
+        metode terbaik sehingga halaman riwayat tidak perlu membaca semua hasil.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                """
+                SELECT r.id, r.created_at, r.instance_hash, r.num_cities, r.use_3opt, r.params,
+                       COUNT(res.id) AS num_methods,
+                       MIN(res.final_distance) AS best_distance,
+                       (SELECT b.method FROM results b WHERE b.run_id = r.id
+                        ORDER BY b.final_distance, b.id LIMIT 1) AS best_method
+                FROM runs r LEFT JOIN results res ON res.run_id = r.id
+                GROUP BY r.id
+                ORDER BY r.id DESC
+                LIMIT ? OFFSET ?
+                """,
+                (limit, offset)
+            ).fetchall()
+        return [
+            {
+                'Run ID': row['id'],
+                'Timestamp': row['created_at'],
+                'Instance Hash': row['instance_hash'],
+                'Num Cities': row['num_cities'],
+                'Use 3-Opt': bool(row['use_3opt']),
+                'Params': json.loads(row['params']),
+                'Methods': row['num_methods'],
+                'Best Method': row['best_method'],
+                'Best Distance': row['best_distance']
+            }
+            for row in rows
+        ]
+
+    def get_results(self, run_id, include_tour=False):
+        """Hasil per metode untuk satu run; tur hanya di-decode jika include_tour=True."""
+        columns = ', '.join(col for col, _ in RESULT_COLUMNS)
+        if include_tour:
+            columns += ', tour'
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT id, {columns} FROM results WHERE run_id = ? ORDER BY id', (run_id,)
+            ).fetchall()
+        results = []
+        for row in rows:
+            result = {key: row[col] for col, key in RESULT_COLUMNS}
+            if include_tour:
+                result['Tour'] = decode_tour(row['tour'])
+            results.append(result)
+        return results
+
+    def get_tour(self, run_id, method):
+        """Membaca tur satu metode pada sebuah run (None jika tidak ada)."""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT tour FROM results WHERE run_id = ? AND method = ? ORDER BY id LIMIT 1',
+                (run_id, method)
+            ).fetchone()
+        return decode_tour(row['tour']) if row else None
+
+    def iter_export_rows(self, batch_size=1000):
+        """Generator baris export (tanpa tur), dibaca per batch agar memori tetap kecil."""
+        last_id = 0
+        columns = ', '.join(f'res.{col}' for col, _ in RESULT_COLUMNS)
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    f"""
+                    SELECT res.id AS result_id, r.id, r.created_at, r.instance_hash, r.num_cities, r.use_3opt, {columns}
+                    FROM results res JOIN runs r ON r.id = res.run_id
+                    WHERE res.id > ?
+                    ORDER BY res.id
+                    LIMIT ?
+                    """,
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                yield [row['id'], row['created_at'], row['instance_hash'], row['num_cities'], bool(row['use_3opt'])] + \
+                      [row[col] for col, _ in RESULT_COLUMNS]
+            last_id = rows[-1]['result_id']
+
+    def export_csv(self, fileobj=None):
+        """
+        Export seluruh riwayat ke CSV (satu baris per metode per run). Jika fileobj
+        diberikan, CSV ditulis ke sana; jika tidak, dikembalikan sebagai string.
+        """
+        import csv
+        import io
+
+        target = fileobj if fileobj is not None else io.StringIO()
+        writer = csv.writer(target, lineterminator='\n')
+        writer.writerow(EXPORT_HEADER)
+        writer.writerows(self.iter_export_rows())
+        if fileobj is None:
+            return target.getvalue()
+
+    def clear(self, source=None):
+        """
+        Menghapus riwayat. Jika source diberikan, hanya run dengan params.source tersebut
+        yang dihapus (run lama tanpa source dianggap berasal dari 'app').
+        Mengembalikan jumlah run yang dihapus.
+        """
+        where, args = '', ()
+        if source is not None:
+            where, args = "WHERE COALESCE(json_extract(params, '$.source'), 'app') = ?", (source,)
+        with self.lock, self.conn:
+            self.conn.execute(f'DELETE FROM results WHERE run_id IN (SELECT id FROM runs {where})', args)
+            return self.conn.execute(f'DELETE FROM runs {where}', args).rowcount
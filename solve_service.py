@@ -0,0 +1,437 @@
+"""
+TSP Solve Service
+HTTP/JSON endpoint lokal untuk pipeline tsp_solver, agar service lain bisa memanggil
+solver tanpa melalui Streamlit.
+
+Endpoint:
+    POST /solve           -> menyelesaikan satu instance (format body sama dengan satu baris JSONL batch_runner)
+    POST /cancel/<id>     -> membatalkan request yang masih antre atau sedang berjalan
+    GET  /metrics         -> kedalaman antrean, jumlah request, dan persentil latensi
+    GET  /health          -> status service
+
+Contoh:
+    python solve_service.py --port 8765 --workers 4 --queue-size 64
+    curl -X POST localhost:8765/solve -d '{"cities": [[1,0,0],[2,3,4],[3,6,0]], "time_budget": 5}'
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from batch_runner import parse_jsonl_record, solve_instance
+from tsp_solver import CONSTRUCTION_METHODS
+
+DEFAULT_METHODS = ['Cheapest Insertion']
+DEFAULT_TIME_BUDGET = 30.0
+POLL_INTERVAL = 0.05
+LATENCY_WINDOW = 1000
+
+class DuplicateJobError(Exception):
+    """ID job sudah dipakai oleh request lain yang masih aktif."""
+
+# --- 1. Worker Pool ---
+
+def _worker_loop(conn):
+    """Loop proses worker: menerima job dari pipe dan mengirim hasilnya kembali."""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        try:
+            result = solve_instance(**job)
+        except Exception as e:
+            result = {'id': job['instance_id'], 'error': str(e)}
+        conn.send(result)
+
+class Job:
+    """
+    Satu request solve yang menunggu di antrean. Status hanya berpindah
+    queued -> running -> selesai (ok/error/timeout/cancelled) atau queued -> selesai;
+    semua transisi dijaga lock sehingga job yang sudah selesai tidak bisa berjalan lagi.
+    """
+
+    def __init__(self, job_id, payload, time_budget):
+        self.id = job_id
+        self.payload = payload
+        self.enqueued_at = time.time()
+        self.deadline = self.enqueued_at + time_budget
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.status = 'queued'
+        self.result = None
+
+    def _finish_locked(self, status, result):
+        self.status = status
+        self.result = result
+        self.done.set()
+
+    def start(self):
+        """Menandai job running; False (dan job diselesaikan) jika sudah selesai, dibatalkan, atau lewat deadline."""
+        with self.lock:
+            if self.done.is_set():
+                return False
+            if self.cancelled.is_set():
+                self._finish_locked('cancelled', None)
+                return False
+            if time.time() >= self.deadline:
+                self._finish_locked('timeout', None)
+                return False
+            self.status = 'running'
+            return True
+
+    def finish(self, status, result=None):
+        """Menyelesaikan job; False jika job sudah selesai sebelumnya."""
+        with self.lock:
+            if self.done.is_set():
+                return False
+            self._finish_locked(status, result)
+            return True
+
+    def finish_if_queued(self, status):
+        """Menyelesaikan job hanya jika belum diambil dispatcher."""
+        with self.lock:
+            if self.done.is_set() or self.status != 'queued':
+                return False
+            self._finish_locked(status, None)
+            return True
+
+class Worker:
+    """
+    Proses worker yang sudah di-fork sebelum request datang (import sudah hangat).
+    Satu thread dispatcher per worker mengambil job dari antrean bersama; jika job
+    melewati time budget atau dibatalkan, proses dihentikan lalu dijalankan ulang.
+    """
+
+    def __init__(self, job_queue, metrics):
+        self.job_queue = job_queue
+        self.metrics = metrics
+        self.process = None
+        self.conn = None
+        self._spawn()
+        self.thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self.thread.start()
+
+    def _spawn(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_loop, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def _restart(self):
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+        self._spawn()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+    def _dispatch_loop(self):
+        while True:
+            job = self.job_queue.get()
+            if job is None:
+                break
+            self._run_job(job)
+            self.metrics.record(job)
+
+    def _run_job(self, job):
+        if not job.start():
+            return
+
+        self.metrics.job_started()
+        try:
+            self.conn.send(job.payload)
+            while not self.conn.poll(POLL_INTERVAL):
+                if job.cancelled.is_set():
+                    self._restart()
+                    job.finish('cancelled')
+                    return
+                if time.time() >= job.deadline:
+                    self._restart()
+                    job.finish('timeout')
+                    return
+            result = self.conn.recv()
+        except (EOFError, BrokenPipeError, OSError) as e:
+            self._restart()
+            job.finish('error', {'id': job.id, 'error': f"Worker gagal: {e}"})
+            return
+        finally:
+            self.metrics.job_finished()
+
+        job.finish('error' if 'error' in result else 'ok', result)
+
+# --- 2. Metrik ---
+
+def percentile(sorted_values, pct):
+    """Persentil (nearest-rank) dari daftar yang sudah terurut."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class Metrics:
+    """Penghitung request dan latensi (jendela LATENCY_WINDOW request terakhir)."""
+
+    def __init__(self, queue_depth, queue_capacity):
+        self.queue_depth = queue_depth
+        self.queue_capacity = queue_capacity
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {'ok': 0, 'error': 0, 'timeout': 0, 'cancelled': 0, 'rejected': 0}
+        self.running = 0
+
+    def job_started(self):
+        with self.lock:
+            self.running += 1
+
+    def job_finished(self):
+        with self.lock:
+            self.running -= 1
+
+    def rejected(self):
+        with self.lock:
+            self.counts['rejected'] += 1
+
+    def record(self, job):
+        with self.lock:
+            self.counts[job.status] = self.counts.get(job.status, 0) + 1
+            if job.status == 'ok':
+                self.latencies.append(time.time() - job.enqueued_at)
+
+    def snapshot(self):
+        queue_depth = self.queue_depth()
+        with self.lock:
+            latencies = sorted(self.latencies)
+            return {
+                'queue_depth': queue_depth,
+                'queue_capacity': self.queue_capacity,
+                'running': self.running,
+                'requests': dict(self.counts),
+                'latency_s': {
+                    'samples': len(latencies),
+                    'p50': percentile(latencies, 50),
+                    'p90': percentile(latencies, 90),
+                    'p99': percentile(latencies, 99),
+                    'max': latencies[-1] if latencies else None
+                }
+            }
+
+# --- 3. Service ---
+
+class SolveService:
+    """
+    Menggabungkan antrean terbatas, worker pool, dan registry job yang aktif.
+    Kapasitas antrean dihitung dari job di registry yang masih berstatus queued, sehingga
+    job yang dibatalkan/timeout saat antre langsung melepas slotnya; entri basinya di
+    job_queue dilewati dispatcher.
+    """
+
+    def __init__(self, workers=2, queue_size=64, default_time_budget=DEFAULT_TIME_BUDGET,
+                 max_time_budget=None):
+        self.job_queue = queue.Queue()
+        self.queue_size = queue_size
+        self.metrics = Metrics(self.queue_depth, queue_size)
+        self.default_time_budget = default_time_budget
+        self.max_time_budget = max(max_time_budget or default_time_budget, default_time_budget)
+        self.jobs = {}
+        self.jobs_lock = threading.Lock()
+        self.workers = [Worker(self.job_queue, self.metrics) for _ in range(workers)]
+
+    def build_job(self, body):
+        """Validasi body request dan membuat Job. Melempar ValueError jika body tidak valid."""
+        if not isinstance(body, dict) or 'cities' not in body:
+            raise ValueError("Body harus berupa objek JSON dengan field 'cities'")
+        methods = body.get('methods', DEFAULT_METHODS)
+        if not isinstance(methods, list) or not methods:
+            raise ValueError("methods harus berupa daftar metode yang tidak kosong")
+        for method in methods:
+            if method not in CONSTRUCTION_METHODS:
+                raise ValueError(f"Metode tidak dikenal: {method}")
+        time_budget = float(body.get('time_budget', self.default_time_budget))
+        if not math.isfinite(time_budget) or time_budget <= 0:
+            raise ValueError("time_budget harus berupa angka positif yang terhingga")
+        time_budget = min(time_budget, self.max_time_budget)
+
+        ai_runs = int(body.get('ai_runs', 5))
+        if ai_runs < 1:
+            raise ValueError("ai_runs minimal 1")
+
+        job_id = str(body.get('id') or uuid.uuid4().hex)
+        payload = {
+            'instance_id': job_id,
+            'cities_data': parse_jsonl_record(body),
+            'methods': methods,
+            'use_3opt': bool(body.get('use_3opt', True)),
+            'ai_runs': ai_runs
+        }
+        return Job(job_id, payload, time_budget)
+
+    def submit(self, job):
+        """
+        Memasukkan job ke antrean; False jika antrean penuh. Melempar DuplicateJobError
+        jika ID job masih dipakai request lain yang aktif.
+        """
+        with self.jobs_lock:
+            if job.id in self.jobs:
+                raise DuplicateJobError(f"ID {job.id} sedang diproses")
+            full = self._queue_depth_locked() >= self.queue_size
+            if not full:
+                self.jobs[job.id] = job
+                self.job_queue.put_nowait(job)
+        if full:
+            self.metrics.rejected()
+            return False
+        return True
+
+    def _queue_depth_locked(self):
+        return sum(1 for job in self.jobs.values() if job.status == 'queued' and not job.done.is_set())
+
+    def queue_depth(self):
+        """Jumlah job yang benar-benar masih menunggu worker."""
+        with self.jobs_lock:
+            return self._queue_depth_locked()
+
+    def wait(self, job):
+        """
+        Menunggu job selesai lalu melepasnya dari registry. Job yang masih antre saat
+        deadline lewat langsung dijawab timeout; job yang sedang berjalan dihentikan
+        oleh dispatcher-nya dalam POLL_INTERVAL.
+        """
+        job.done.wait(timeout=max(0, job.deadline - time.time()))
+        job.finish_if_queued('timeout')
+        job.done.wait()
+        with self.jobs_lock:
+            if self.jobs.get(job.id) is job:
+                del self.jobs[job.id]
+        return job
+
+    def cancel(self, job_id):
+        with self.jobs_lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancelled.set()
+        job.finish_if_queued('cancelled')
+        return True
+
+    def shutdown(self):
+        for _ in self.workers:
+            self.job_queue.put(None)
+        for worker in self.workers:
+            worker.thread.join(timeout=1)
+            worker.stop()
+
+STATUS_CODES = {'ok': 200, 'error': 422, 'timeout': 504, 'cancelled': 409}
+
+def make_handler(service):
+    """Membuat kelas handler HTTP yang terikat ke satu SolveService."""
+
+    class SolveHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, code, data, headers=None):
+            body = json.dumps(data).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send_json(200, service.metrics.snapshot())
+            elif self.path == '/health':
+                self._send_json(200, {'status': 'ok', 'workers': len(service.workers)})
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            raw = self.rfile.read(length)
+
+            if self.path.startswith('/cancel/'):
+                job_id = self.path[len('/cancel/'):]
+                found = service.cancel(job_id)
+                self._send_json(200 if found else 404, {'id': job_id, 'cancelled': found})
+                return
+            if self.path != '/solve':
+                self._send_json(404, {'error': 'Not found'})
+                return
+
+            try:
+                job = service.build_job(json.loads(raw or b'{}'))
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {'error': str(e)})
+                return
+
+            # ID job (termasuk yang dibuat server) selalu dikembalikan lewat header
+            headers = {'X-Job-Id': job.id}
+            try:
+                submitted = service.submit(job)
+            except DuplicateJobError as e:
+                self._send_json(409, {'id': job.id, 'error': str(e)}, headers)
+                return
+            if not submitted:
+                self._send_json(503, {'id': job.id, 'error': 'Antrean penuh'}, headers)
+                return
+
+            service.wait(job)
+            if job.status in ('ok', 'error'):
+                self._send_json(STATUS_CODES[job.status], job.result, headers)
+            else:
+                self._send_json(STATUS_CODES[job.status], {'id': job.id, 'error': job.status}, headers)
+
+    return SolveHandler
+
+def serve(host='127.0.0.1', port=8765, workers=2, queue_size=64, default_time_budget=DEFAULT_TIME_BUDGET,
+          max_time_budget=None):
+    """Menjalankan service sampai dihentikan (Ctrl+C)."""
+    service = SolveService(workers, queue_size, default_time_budget, max_time_budget)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    print(f"TSP solve service berjalan di http://{host}:{port} ({workers} worker, antrean {queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP solve service lokal untuk TSP")
+    parser.add_argument('--host', default='127.0.0.1', help="Alamat bind (default: hanya localhost)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2, help="Jumlah proses worker")
+    parser.add_argument('--queue-size', type=int, default=64, help="Kapasitas antrean request")
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help="Time budget default per request (detik)")
+    parser.add_argument('--max-time-budget', type=float, default=None,
+                        help="Batas atas time_budget yang boleh diminta request (default: sama dengan --time-budget)")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, args.queue_size, args.time_budget, args.max_time_budget)
+
+if __name__ == '__main__':
+    main()
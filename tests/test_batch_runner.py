@@ -0,0 +1,156 @@
+import json
+
+import pytest
+
+import batch_runner
+from batch_runner import InstanceReadError, iter_instances, read_tsplib_instance, run_batch, run_batch_to_jsonl
+
+TRIANGLE = [[1, 0, 0], [2, 3, 4], [3, 6, 0]]
+
+
+def write_jsonl(path, records):
+    path.write_text(''.join(json.dumps(r) + '\n' for r in records))
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_bad_inputs_become_error_records(tmp_path):
+    source = tmp_path / 'in'
+    source.mkdir()
+    write_jsonl(source / 'a.jsonl', [{'id': f'ok{i}', 'cities': TRIANGLE} for i in range(3)])
+    with open(source / 'a.jsonl', 'a') as f:
+        f.write('{bad json\n')
+        f.write('{"id": "no-cities"}\n')
+    (source / 'bad.csv').write_text('city_id,x,y\n1,1,2\n2,abc,3\n')
+    (source / 'good.csv').write_text('city_id,x,y\n1,0,0\n2,3,4\n3,6,0\n')
+
+    output = tmp_path / 'out.jsonl'
+    assert run_batch_to_jsonl(str(source), str(output), ['Nearest Neighbor'], workers=2) == 7
+
+    records = {r['id']: r for r in read_records(output)}
+    assert set(records) == {'ok0', 'ok1', 'ok2', 'a.jsonl:4', 'no-cities', 'bad.csv', 'good.csv'}
+    for instance_id in ('a.jsonl:4', 'no-cities', 'bad.csv'):
+        assert 'error' in records[instance_id]
+    assert records['good.csv']['best_distance'] == 16.0
+
+
+def test_checkpoint_resume_skips_completed(tmp_path):
+    source = tmp_path / 'in.jsonl'
+    write_jsonl(source, [{'id': f'i{i}', 'cities': TRIANGLE} for i in range(5)] + [{'id': 'broken'}])
+    output = tmp_path / 'out.jsonl'
+    checkpoint = tmp_path / 'ckpt'
+    checkpoint.write_text('i0\ni1\n')
+    output.write_text(json.dumps({'id': 'i0'}) + '\n' + json.dumps({'id': 'i1'}) + '\n')
+
+    count = run_batch_to_jsonl(str(source), str(output), ['Nearest Neighbor'],
+                               workers=2, checkpoint_path=str(checkpoint))
+    assert count == 4
+    assert sorted(r['id'] for r in read_records(output)) == ['broken', 'i0', 'i1', 'i2', 'i3', 'i4']
+    assert sorted(checkpoint.read_text().split()) == ['broken', 'i0', 'i1', 'i2', 'i3', 'i4']
+
+    # Semua instance (termasuk yang error) sudah tercatat; resume berikutnya tidak mengerjakan apa pun
+    assert run_batch_to_jsonl(str(source), str(output), ['Nearest Neighbor'],
+                              workers=2, checkpoint_path=str(checkpoint)) == 0
+
+
+def _crash_on_boom(instance_id, *args):
+    if instance_id == 'boom':
+        import os
+        os._exit(1)
+    return _real_solve_instance_safe(instance_id, *args)
+
+
+_real_solve_instance_safe = batch_runner._solve_instance_safe
+
+
+def test_dead_worker_does_not_stop_batch(monkeypatch):
+    monkeypatch.setattr(batch_runner, '_solve_instance_safe', _crash_on_boom)
+    cities = {1: {'X': 0, 'Y': 0}, 2: {'X': 3, 'Y': 4}, 3: {'X': 6, 'Y': 0}}
+    ids = ['ok0', 'ok1', 'boom', 'ok2', 'ok3']
+
+    records = {r['id']: r for r in run_batch(((i, cities) for i in ids), ['Nearest Neighbor'], workers=2)}
+    assert set(records) == set(ids)
+    assert 'error' in records['boom']
+    assert all('error' not in records[i] for i in ids if i != 'boom')
+
+
+def test_tsplib_rejects_non_euc_2d(tmp_path):
+    geo = tmp_path / 'geo.tsp'
+    geo.write_text('NAME: geo\nEDGE_WEIGHT_TYPE : GEO\nNODE_COORD_SECTION\n1 1 1\n2 2 2\nEOF\n')
+    with pytest.raises(ValueError, match='GEO'):
+        read_tsplib_instance(str(geo))
+    [(instance_id, data)] = list(iter_instances(str(geo)))
+    assert instance_id == 'geo.tsp' and isinstance(data, InstanceReadError)
+
+    euc = tmp_path / 'euc.tsp'
+    euc.write_text('NAME: euc\nEDGE_WEIGHT_TYPE: EUC_2D\nNODE_COORD_SECTION\n1 0 0\n2 3 4\nEOF\n')
+    assert read_tsplib_instance(str(euc)) == {1: {'X': 0.0, 'Y': 0.0}, 2: {'X': 3.0, 'Y': 4.0}}
+
+
+def test_ai_runs_must_be_positive():
+    with pytest.raises(ValueError):
+        list(run_batch(iter([]), ['Arbitrary Insertion'], ai_runs=0, workers=1))
+    with pytest.raises(SystemExit):
+        batch_runner.main(['-', '--ai-runs', '0'])
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'workers': 0},
+    {'workers': -1},
+    {'max_in_flight': 0},
+    {'max_in_flight': -1},
+    {'methods': []},
+    {'methods': 'Nearest Neighbor'}
+])
+def test_run_batch_rejects_bad_arguments(kwargs):
+    kwargs = dict({'methods': ['Nearest Neighbor']}, **kwargs)
+    with pytest.raises(ValueError):
+        list(run_batch(iter([]), **kwargs))
+
+
+@pytest.mark.parametrize('flag', ['--workers', '--max-in-flight'])
+def test_cli_rejects_non_positive_pool_sizes(flag):
+    with pytest.raises(SystemExit):
+        batch_runner.main(['-', flag, '-1'])
+
+
+def test_store_failure_does_not_stop_batch(tmp_path, monkeypatch, capsys):
+    import results_store
+
+    def fail(self, *args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(results_store.ResultsStore, 'record_run', fail)
+    source = tmp_path / 'in.jsonl'
+    write_jsonl(source, [{'id': f'i{i}', 'cities': TRIANGLE} for i in range(3)])
+    output = tmp_path / 'out.jsonl'
+    checkpoint = tmp_path / 'ckpt'
+
+    count = run_batch_to_jsonl(str(source), str(output), ['Nearest Neighbor'], workers=1,
+                               checkpoint_path=str(checkpoint), store_path=str(tmp_path / 'h.db'))
+    assert count == 3
+    assert sorted(checkpoint.read_text().split()) == ['i0', 'i1', 'i2']
+    assert 'disk full' in capsys.readouterr().err
+
+
+def test_duplicate_ids_across_files_are_rejected(tmp_path):
+    source = tmp_path / 'in'
+    source.mkdir()
+    write_jsonl(source / 'a.jsonl', [{'id': 'same', 'cities': TRIANGLE}, {'id': 'a1', 'cities': TRIANGLE}])
+    write_jsonl(source / 'b.jsonl', [{'id': 'same', 'cities': TRIANGLE}])
+    output = tmp_path / 'out.jsonl'
+    checkpoint = tmp_path / 'ckpt'
+
+    assert run_batch_to_jsonl(str(source), str(output), ['Nearest Neighbor'], workers=1,
+                              checkpoint_path=str(checkpoint)) == 3
+    records = read_records(output)
+    same = [r for r in records if r['id'] == 'same']
+    assert len(same) == 2
+    assert sum('error' in r for r in same) == 1
+
+    # Resume tidak mengulang instance mana pun
+    assert run_batch_to_jsonl(str(source), str(output), ['Nearest Neighbor'], workers=1,
+                              checkpoint_path=str(checkpoint)) == 0
+    assert len(read_records(output)) == 3
@@ -0,0 +1,105 @@
+import csv
+import io
+
+import pytest
+
+from results_store import EXPORT_HEADER, ResultsStore, decode_tour, encode_tour, instance_hash
+
+
+def make_result(method, distance, tour):
+    return {
+        'Method': method,
+        'Initial Distance': distance + 1,
+        'Final Distance': distance,
+        'Improvement (%)': 1.0,
+        'Construction Time (s)': 0.01,
+        '3-Opt Time (s)': 0.02,
+        'Total Time (s)': 0.03,
+        'Tour': tour
+    }
+
+
+@pytest.fixture
+def store():
+    store = ResultsStore(':memory:')
+    yield store
+    store.close()
+
+
+def test_encode_decode_tour_roundtrip():
+    tour = [5, 1, 2**31 - 1, 3000000000, 3, 0]
+    blob = encode_tour(tour)
+    assert len(blob) == 8 * len(tour)
+    assert decode_tour(blob) == tour
+    assert decode_tour(encode_tour([])) == []
+
+
+def test_instance_hash_ignores_dict_order():
+    a = {1: {'X': 0, 'Y': 0}, 2: {'X': 3, 'Y': 4}}
+    b = {2: {'X': 3.0, 'Y': 4.0}, 1: {'X': 0.0, 'Y': 0.0}}
+    assert instance_hash(a) == instance_hash(b)
+    assert instance_hash(a) != instance_hash({1: {'X': 0, 'Y': 0}, 2: {'X': 3, 'Y': 5}})
+
+
+def test_record_and_read_back(store):
+    run_id = store.record_run('h', 3, True, [
+        make_result('Nearest Neighbor', 20.0, [1, 2, 3]),
+        make_result('Cheapest Insertion', 16.0, [1, 3, 2])
+    ], params={'source': 'app'})
+
+    [run] = store.list_runs()
+    assert run['Run ID'] == run_id
+    assert run['Params'] == {'source': 'app'}
+    assert run['Methods'] == 2
+    assert run['Best Method'] == 'Cheapest Insertion'
+    assert run['Best Distance'] == 16.0
+
+    results = store.get_results(run_id)
+    assert [r['Method'] for r in results] == ['Nearest Neighbor', 'Cheapest Insertion']
+    assert 'Tour' not in results[0]
+    assert store.get_results(run_id, include_tour=True)[1]['Tour'] == [1, 3, 2]
+    assert store.get_tour(run_id, 'Nearest Neighbor') == [1, 2, 3]
+    assert store.get_tour(run_id, 'Farthest Insertion') is None
+
+
+def test_record_run_accepts_large_city_ids(store):
+    run_id = store.record_run('h', 2, False, [make_result('Nearest Neighbor', 1.0, [3000000000, 1])])
+    assert store.get_tour(run_id, 'Nearest Neighbor') == [3000000000, 1]
+
+
+def test_list_runs_pagination(store):
+    run_ids = [store.record_run(f'h{i}', 2, False, [make_result('A', i, [1, 2])]) for i in range(25)]
+    assert store.count_runs() == 25
+
+    first = store.list_runs(limit=10, offset=0)
+    last = store.list_runs(limit=10, offset=20)
+    assert [r['Run ID'] for r in first] == run_ids[::-1][:10]
+    assert [r['Run ID'] for r in last] == run_ids[::-1][20:]
+    assert store.list_runs(limit=10, offset=30) == []
+
+
+def test_export_csv_streams_all_rows(store):
+    for i in range(3):
+        store.record_run(f'h{i}', 2, True, [make_result('A', i, [1, 2]), make_result('B', i + 1, [2, 1])])
+
+    rows = list(csv.reader(io.StringIO(store.export_csv())))
+    assert rows[0] == EXPORT_HEADER
+    assert len(rows) == 1 + 6
+    assert list(store.iter_export_rows(batch_size=4)) == list(store.iter_export_rows(batch_size=1000))
+
+    buffer = io.StringIO()
+    assert store.export_csv(buffer) is None
+    assert buffer.getvalue() == store.export_csv()
+
+
+def test_clear_by_source_keeps_batch_runs(store):
+    store.record_run('app', 2, True, [make_result('A', 1, [1, 2])], params={'source': 'app'})
+    store.record_run('legacy', 2, True, [make_result('A', 1, [1, 2])])
+    batch_id = store.record_run('batch', 2, True, [make_result('A', 1, [1, 2])], params={'source': 'batch_runner'})
+
+    assert store.clear(source='app') == 2
+    assert [r['Run ID'] for r in store.list_runs()] == [batch_id]
+    assert len(list(store.iter_export_rows())) == 1
+
+    assert store.clear() == 1
+    assert store.count_runs() == 0
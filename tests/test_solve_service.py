@@ -0,0 +1,246 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from solve_service import DuplicateJobError, Job, SolveService, make_handler, percentile
+
+TRIANGLE = [[1, 0, 0], [2, 3, 4], [3, 6, 0]]
+
+
+def slow_body(**extra):
+    """Instance yang cukup besar agar Cheapest Insertion + 3-Opt melewati time budget kecil."""
+    rng = random.Random(0)
+    cities = [[i, rng.random() * 1000, rng.random() * 1000] for i in range(1, 121)]
+    return dict({'cities': cities, 'methods': ['Cheapest Insertion']}, **extra)
+
+
+# --- Job state machine ---
+
+def test_job_start_and_finish():
+    job = Job('a', {}, 10)
+    assert job.start()
+    assert job.status == 'running'
+    assert not job.finish_if_queued('timeout')
+    assert job.finish('ok', {'id': 'a'})
+    assert not job.finish('error')
+    assert job.status == 'ok' and job.result == {'id': 'a'}
+
+
+def test_finished_job_cannot_start():
+    job = Job('a', {}, 10)
+    assert job.finish_if_queued('timeout')
+    assert not job.start()
+    assert job.status == 'timeout'
+
+
+def test_start_honours_cancel_and_deadline():
+    cancelled = Job('a', {}, 10)
+    cancelled.cancelled.set()
+    assert not cancelled.start()
+    assert cancelled.status == 'cancelled'
+
+    expired = Job('b', {}, 10)
+    expired.deadline = time.time() - 1
+    assert not expired.start()
+    assert expired.status == 'timeout'
+
+
+def test_concurrent_transitions_end_in_one_final_state():
+    for _ in range(200):
+        job = Job('a', {}, 10)
+        barrier = threading.Barrier(2)
+
+        def dispatcher():
+            barrier.wait()
+            if job.start():
+                job.finish('ok', {})
+
+        def waiter():
+            barrier.wait()
+            job.finish_if_queued('timeout')
+
+        threads = [threading.Thread(target=dispatcher), threading.Thread(target=waiter)]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+        assert job.done.is_set()
+        assert job.status in ('ok', 'timeout')
+
+
+# --- Metrik ---
+
+def test_percentile_nearest_rank():
+    values = [1, 2, 3, 4, 5]
+    assert percentile(values, 90) == 5
+    assert percentile(values, 50) == 3
+    assert percentile(values, 10) == 1
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 62.5) == 3
+    assert percentile([], 50) is None
+
+
+# --- build_job ---
+
+@pytest.fixture
+def bare_service():
+    service = SolveService(workers=0, queue_size=1, default_time_budget=10, max_time_budget=20)
+    yield service
+    service.shutdown()
+
+
+@pytest.mark.parametrize('budget', ['inf', 1e400, 'nan', 0, -1])
+def test_build_job_rejects_bad_time_budget(bare_service, budget):
+    with pytest.raises(ValueError):
+        bare_service.build_job({'cities': TRIANGLE, 'time_budget': budget})
+
+
+@pytest.mark.parametrize('methods', [[], 'Cheapest Insertion', None, {'Cheapest Insertion': 1}])
+def test_build_job_rejects_empty_or_non_list_methods(bare_service, methods):
+    with pytest.raises(ValueError):
+        bare_service.build_job({'cities': TRIANGLE, 'methods': methods})
+
+
+def test_build_job_caps_time_budget(bare_service):
+    job = bare_service.build_job({'cities': TRIANGLE, 'time_budget': 1000})
+    assert job.deadline - job.enqueued_at == pytest.approx(20)
+
+
+def test_build_job_rejects_bad_ai_runs_and_methods(bare_service):
+    with pytest.raises(ValueError):
+        bare_service.build_job({'cities': TRIANGLE, 'ai_runs': 0})
+    with pytest.raises(ValueError):
+        bare_service.build_job({'cities': TRIANGLE, 'methods': ['Unknown']})
+
+
+def test_queued_job_is_cancelled_without_worker(bare_service):
+    job = bare_service.build_job({'cities': TRIANGLE, 'id': 'q'})
+    assert bare_service.submit(job)
+    assert not bare_service.submit(bare_service.build_job({'cities': TRIANGLE}))
+    assert bare_service.cancel('q')
+    assert bare_service.wait(job).status == 'cancelled'
+    assert not bare_service.cancel('q')
+
+
+def test_finished_queued_jobs_free_their_slot(bare_service):
+    job = bare_service.build_job({'cities': TRIANGLE, 'id': 'a'})
+    assert bare_service.submit(job)
+    assert bare_service.metrics.snapshot()['queue_depth'] == 1
+
+    # Job yang timeout saat antre tidak lagi dihitung meskipun entrinya masih ada di job_queue
+    job.deadline = time.time()
+    assert bare_service.wait(job).status == 'timeout'
+    assert bare_service.metrics.snapshot()['queue_depth'] == 0
+    assert bare_service.submit(bare_service.build_job({'cities': TRIANGLE, 'id': 'b'}))
+    assert bare_service.metrics.snapshot()['queue_depth'] == 1
+
+
+def test_duplicate_active_id_is_rejected(bare_service):
+    first = bare_service.build_job({'cities': TRIANGLE, 'id': 'dup'})
+    assert bare_service.submit(first)
+    with pytest.raises(DuplicateJobError):
+        bare_service.submit(bare_service.build_job({'cities': TRIANGLE, 'id': 'dup'}))
+    assert bare_service.jobs['dup'] is first
+
+    # wait() hanya melepas job miliknya sendiri dari registry
+    other = bare_service.build_job({'cities': TRIANGLE, 'id': 'dup'})
+    other.finish('cancelled')
+    bare_service.wait(other)
+    assert bare_service.jobs['dup'] is first
+
+
+# --- HTTP ---
+
+@pytest.fixture
+def server():
+    service = SolveService(workers=1, queue_size=1, default_time_budget=10)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(service))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield service, f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+    service.shutdown()
+
+
+def request(url, body=None, headers=None):
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(url, data=data, method='GET' if body is None else 'POST')
+    try:
+        with urllib.request.urlopen(req) as response:
+            if headers is not None:
+                headers.update(response.headers)
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        if headers is not None:
+            headers.update(e.headers)
+        return e.code, json.loads(e.read())
+
+
+def test_solve_ok_and_metrics(server):
+    _, url = server
+    headers = {}
+    status, result = request(url + '/solve', {'cities': TRIANGLE, 'id': 't'}, headers)
+    assert status == 200
+    assert result['id'] == 't' and result['best_distance'] == 16.0
+    assert headers['X-Job-Id'] == 't'
+
+    headers = {}
+    status, result = request(url + '/solve', {'cities': TRIANGLE}, headers)
+    assert status == 200 and headers['X-Job-Id'] == result['id']
+
+    status, metrics = request(url + '/metrics')
+    assert status == 200
+    assert metrics['requests']['ok'] == 2
+    assert metrics['latency_s']['samples'] == 2
+
+
+def test_bad_body_is_400(server):
+    _, url = server
+    assert request(url + '/solve', {'cities': TRIANGLE, 'time_budget': 'inf'})[0] == 400
+    assert request(url + '/solve', {'nope': 1})[0] == 400
+    assert request(url + '/solve', {'cities': TRIANGLE, 'methods': []})[0] == 400
+
+
+def test_timeout_respawns_worker(server):
+    service, url = server
+    pid = service.workers[0].process.pid
+    status, _ = request(url + '/solve', slow_body(time_budget=0.2))
+    assert status == 504
+    assert service.workers[0].process.pid != pid
+    assert request(url + '/solve', {'cities': TRIANGLE})[0] == 200
+
+
+def test_cancel_running_job_is_409(server):
+    service, url = server
+    responses = {}
+    thread = threading.Thread(target=lambda: responses.setdefault(
+        'solve', request(url + '/solve', slow_body(id='slow', time_budget=10))))
+    thread.start()
+    deadline = time.time() + 5
+    while 'slow' not in service.jobs and time.time() < deadline:
+        time.sleep(0.01)
+    assert request(url + '/solve', {'cities': TRIANGLE, 'id': 'slow'})[0] == 409
+    status, body = request(url + '/cancel/slow', {})
+    thread.join(timeout=10)
+    assert status == 200 and body['cancelled']
+    assert responses['solve'][0] == 409
+    assert request(url + '/cancel/slow', {})[0] == 404
+
+
+def test_full_queue_is_503(server):
+    _, url = server
+    statuses = []
+    threads = [
+        threading.Thread(target=lambda: statuses.append(request(url + '/solve', slow_body(time_budget=1))[0]))
+        for _ in range(6)
+    ]
+    [t.start() for t in threads]
+    [t.join(timeout=15) for t in threads]
+    # 1 worker + antrean 1: sisanya ditolak
+    assert statuses.count(503) >= 4
+    assert set(statuses) <= {503, 504}
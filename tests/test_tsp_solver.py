@@ -0,0 +1,20 @@
+import random
+
+import pytest
+
+import tsp_solver
+from tsp_solver import NUMPY_MIN_CITIES, precompute_distances
+
+
+def test_numpy_distances_match_pure_python(monkeypatch):
+    np = pytest.importorskip('numpy')
+    rng = random.Random(0)
+    data = {i: {'X': rng.uniform(-1000, 1000), 'Y': rng.randint(0, 1000)} for i in range(1, NUMPY_MIN_CITIES + 1)}
+    cities_list = list(data)
+
+    vectorized = tsp_solver._precompute_distances_numpy(np, cities_list, data)
+    monkeypatch.setattr(tsp_solver, '_load_numpy', lambda: None)
+    pure = precompute_distances(cities_list, data)
+
+    assert vectorized == pure
+    assert all(type(d) is float for d in vectorized[1].values())
@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('plotly')
+
+from visualization import build_tour_figure, cities_to_arrays, downsample_tour
+
+
+def out_and_back(n=10):
+    """Tur bolak-balik di sumbu x: posisi i dan 2n-1-i berada di titik yang sama."""
+    xs = np.concatenate((np.arange(n), np.arange(n)[::-1])).astype(float)
+    return np.arange(2 * n), xs, np.zeros(2 * n)
+
+
+def test_full_tour_is_closed():
+    tour = np.arange(6)
+    positions = downsample_tour(tour, tour.astype(float), np.zeros(6), max_points=100)
+    assert positions.tolist() == [0, 1, 2, 3, 4, 5, 0]
+
+
+def test_strided_tour_keeps_last_position_and_closes():
+    tour = np.arange(10)
+    positions = downsample_tour(tour, tour.astype(float), np.zeros(10), max_points=3)
+    assert positions.tolist() == [0, 4, 8, 9, 0]
+
+
+def test_viewport_splits_runs_with_gap_marker():
+    tour, xs, ys = out_and_back()
+    positions = downsample_tour(tour, xs, ys, max_points=100, viewport=((4.5, 6.5), (-1, 1)))
+    # Dua bagian (jalan pergi dan pulang) dipisah -1, masing-masing dengan tetangga di luar viewport
+    assert positions.tolist() == [4, 5, 6, 7, -1, 12, 13, 14, 15]
+
+
+def test_viewport_run_wraps_around_tour_end():
+    tour, xs, ys = out_and_back()
+    positions = downsample_tour(tour, xs, ys, max_points=100, viewport=((-1, 0.5), (-1, 1)))
+    # Edge n-1 -> 0 tetap tersambung, tanpa pemutus di tengahnya
+    assert positions.tolist() == [18, 19, 0, 1]
+
+
+def test_nothing_in_viewport():
+    tour, xs, ys = out_and_back()
+    assert len(downsample_tour(tour, xs, ys, max_points=100, viewport=((50, 60), (-1, 1)))) == 0
+
+
+def test_tour_figure_breaks_line_at_gaps():
+    cities = {i + 1: {'X': float(x), 'Y': 0.0} for i, x in enumerate(out_and_back()[1])}
+    ids, xs, ys = cities_to_arrays(cities)
+    fig = build_tour_figure(list(cities), ids, xs, ys, 'Tur', viewport=((4.5, 6.5), (-1, 1)))
+    line_x = np.asarray(fig.data[0].x, dtype=float)
+    assert np.isnan(line_x).sum() == 1
+    assert fig.data[0].connectgaps is False
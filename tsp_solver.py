@@ -1,11 +1,20 @@
 """
 TSP Solver Module
 Berisi implementasi berbagai algoritma heuristik untuk Traveling Salesman Problem
+
+Modul ini sengaja hanya bergantung pada standard library agar cepat di-import oleh
+batch_runner dan worker solve_service. Akselerator opsional (numpy) dimuat saat
+pertama kali dibutuhkan.
 """
 
 import math
 import random
-import copy
+import time
+
+# Jumlah kota minimum sebelum precompute_distances memakai numpy (jika terpasang)
+NUMPY_MIN_CITIES = 200
+
+_numpy = None
 
 # --- 0. Pembuatan Data dan Fungsi Helper ---
 
@@ -24,12 +33,40 @@ def calculate_distance(city1_id, city2_id, data):
     try:
         coord1 = data[city1_id]
         coord2 = data[city2_id]
-        return math.sqrt((coord1['X'] - coord2['X'])**2 + (coord1['Y'] - coord2['Y'])**2)
+        dx = coord1['X'] - coord2['X']
+        dy = coord1['Y'] - coord2['Y']
+        # dx * dx (bukan dx**2, yang lewat pow() libm) agar identik dengan versi numpy
+        return math.sqrt(dx * dx + dy * dy)
     except KeyError:
         return float('inf')
 
+def _load_numpy():
+    """Import numpy secara lazy; mengembalikan None jika tidak terpasang."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+def _precompute_distances_numpy(np, cities_list, data):
+    """Versi vektorisasi precompute_distances (hasil identik dengan versi Python murni)."""
+    xs = np.array([data[c]['X'] for c in cities_list], dtype=float)
+    ys = np.array([data[c]['Y'] for c in cities_list], dtype=float)
+    dx = xs[:, None] - xs[None, :]
+    dy = ys[:, None] - ys[None, :]
+    rows = np.sqrt(dx * dx + dy * dy).tolist()
+    return {c1: dict(zip(cities_list, row)) for c1, row in zip(cities_list, rows)}
+
 def precompute_distances(cities_list, data):
     """Membuat matriks (kamus) jarak untuk pencarian cepat."""
+    if len(cities_list) >= NUMPY_MIN_CITIES and all(c in data for c in cities_list):
+        np = _load_numpy()
+        if np is not None:
+            return _precompute_distances_numpy(np, cities_list, data)
+    
     dist_matrix = {c1: {} for c1 in cities_list}
     for c1 in cities_list:
         for c2 in cities_list:
@@ -251,7 +288,7 @@ def three_opt(initial_tour, dist_matrix):
     Mencoba 7 kemungkinan pembalikan segmen untuk setiap 3 pemutusan.
     Menggunakan strategi 'first improvement'.
     """
-    best_tour = copy.deepcopy(initial_tour)
+    best_tour = list(initial_tour)
     n = len(best_tour)
     improved = True
     
@@ -303,7 +340,50 @@ def three_opt(initial_tour, dist_matrix):
     return best_tour, calculate_tour_distance(best_tour, dist_matrix)
 
 
-# --- 4. Fungsi Utilitas untuk Streamlit ---
+# --- 4. Pipeline (Konstruksi + Perbaikan) ---
+
+CONSTRUCTION_METHODS = {
+    'Nearest Neighbor': lambda cities_list, dist_matrix, ai_runs: solve_nn_all_starts(cities_list, dist_matrix),
+    'Nearest Insertion': lambda cities_list, dist_matrix, ai_runs: solve_insertion_all_starts(cities_list, dist_matrix, 'nearest'),
+    'Farthest Insertion': lambda cities_list, dist_matrix, ai_runs: solve_insertion_all_starts(cities_list, dist_matrix, 'farthest'),
+    'Cheapest Insertion': lambda cities_list, dist_matrix, ai_runs: solve_ci_all_starts(cities_list, dist_matrix),
+    'Arbitrary Insertion': lambda cities_list, dist_matrix, ai_runs: solve_insertion_all_starts(cities_list, dist_matrix, 'arbitrary', num_runs=ai_runs)
+}
+
+def run_pipeline(method, cities_list, dist_matrix, use_3opt=True, ai_runs=5):
+    """
+    Menjalankan satu metode konstruksi, lalu 3-Opt (opsional).
+    Mengembalikan dictionary hasil dengan format yang sama seperti tabel hasil di app.
+    """
+    if method not in CONSTRUCTION_METHODS:
+        raise ValueError(f"Metode tidak dikenal: {method}")
+    
+    start_time = time.time()
+    tour, distance = CONSTRUCTION_METHODS[method](cities_list, dist_matrix, ai_runs)
+    construction_time = time.time() - start_time
+    initial_distance = distance
+    
+    if use_3opt:
+        start_opt = time.time()
+        tour, distance = three_opt(tour, dist_matrix)
+        opt_time = time.time() - start_opt
+    else:
+        opt_time = 0
+    
+    improvement = ((initial_distance - distance) / initial_distance * 100) if use_3opt and initial_distance else 0
+    
+    return {
+        'Method': method,
+        'Initial Distance': round(initial_distance, 2),
+        'Final Distance': round(distance, 2),
+        'Improvement (%)': round(improvement, 2),
+        'Construction Time (s)': round(construction_time, 3),
+        '3-Opt Time (s)': round(opt_time, 3),
+        'Total Time (s)': round(construction_time + opt_time, 3),
+        'Tour': tour
+    }
+
+# --- 5. Fungsi Utilitas untuk Streamlit ---
 
 def validate_cities_data(data):
     """Validasi format data kota."""
@@ -322,12 +402,3 @@ def validate_cities_data(data):
             return False, f"Koordinat kota {city_id} harus berupa angka"
     
     return True, "Valid"
-
-def export_results_to_csv(results):
-    """Export hasil ke format CSV."""
-    import pandas as pd
-    df = pd.DataFrame([
-        {k: v for k, v in r.items() if k != 'Tour'}
-        for r in results
-    ])
-    return df.to_csv(index=False)
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+TSP Visualization Module
+Membangun figure Plotly untuk posisi kota dan rute. Untuk instance besar figure memakai
+Scattergl (WebGL), label teks dimatikan, dan titik di-downsample sesuai viewport (zoom)
+sehingga tur dengan ~100k kota tetap bisa dirender secara interaktif.
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Di atas jumlah titik ini figure memakai Scattergl (WebGL) alih-alih SVG
+WEBGL_THRESHOLD = 1000
+# Label ID kota hanya ditampilkan jika jumlah titik yang digambar tidak melebihi ini
+LABEL_THRESHOLD = 200
+# Jumlah titik maksimum default yang dikirim ke browser per trace
+DEFAULT_MAX_POINTS = 20000
+
+# --- 1. Konversi Data ---
+
+def cities_to_arrays(cities_data):
+    """
+    Mengubah kamus cities_data menjadi array (ids, xs, ys) yang terurut berdasarkan ID.
+    Cukup dibuat sekali per dataset; koordinat tur diambil dari array ini lewat indeks.
+    """
+    n = len(cities_data)
+    ids = np.fromiter(cities_data.keys(), dtype=np.int64, count=n)
+    xs = np.fromiter((c['X'] for c in cities_data.values()), dtype=float, count=n)
+    ys = np.fromiter((c['Y'] for c in cities_data.values()), dtype=float, count=n)
+    order = np.argsort(ids, kind='stable')
+    return ids[order], xs[order], ys[order]
+
+def tour_to_indices(tour, ids):
+    """Mengubah tur (daftar ID kota) menjadi indeks ke array hasil cities_to_arrays."""
+    return np.searchsorted(ids, np.asarray(tour, dtype=np.int64))
+
+# --- 2. Downsampling ---
+
+def viewport_mask(xs, ys, viewport):
+    """Mask titik yang berada di dalam viewport ((x_min, x_max), (y_min, y_max)); None berarti semua."""
+    if viewport is None:
+        return np.ones(len(xs), dtype=bool)
+    (x_min, x_max), (y_min, y_max) = viewport
+    return (xs >= x_min) & (xs <= x_max) & (ys >= y_min) & (ys <= y_max)
+
+def downsample_points(xs, ys, max_points, viewport=None):
+    """
+    Memilih indeks titik yang digambar: hanya titik di dalam viewport, lalu jika masih
+    melebihi max_points, satu titik perwakilan per sel grid. Semakin kecil viewport
+    (zoom in), semakin halus grid-nya sehingga detail bertambah.
+    """
+    indices = np.flatnonzero(viewport_mask(xs, ys, viewport))
+    if len(indices) <= max_points:
+        return indices
+
+    px, py = xs[indices], ys[indices]
+    bins = max(1, int(np.sqrt(max_points)))
+    x_span = max(px.max() - px.min(), 1e-12)
+    y_span = max(py.max() - py.min(), 1e-12)
+    cx = np.minimum(((px - px.min()) / x_span * bins).astype(np.int64), bins - 1)
+    cy = np.minimum(((py - py.min()) / y_span * bins).astype(np.int64), bins - 1)
+    _, first = np.unique(cx * bins + cy, return_index=True)
+    return indices[np.sort(first)]
+
+def downsample_tour(tour_indices, xs, ys, max_points, viewport=None):
+    """
+    Memilih posisi tur yang digambar sebagai garis rute, dengan nilai -1 sebagai pemutus
+    garis. Posisi di dalam viewport diambil beserta tetangga langsungnya di luar viewport,
+    sehingga edge yang keluar-masuk viewport terpotong oleh batas sumbu, bukan digambar
+    sebagai edge palsu. Jika melebihi max_points, tiap bagian diambil setiap k langkah
+    dengan titik awal dan akhir bagian tetap dipertahankan. Tur penuh ditutup kembali
+    ke posisi awal.
+    """
+    n = len(tour_indices)
+    inside = viewport_mask(xs[tour_indices], ys[tour_indices], viewport)
+    keep = inside | np.roll(inside, 1) | np.roll(inside, -1)
+
+    if keep.all():
+        positions = np.arange(n)
+        if n > max_points:
+            step = int(np.ceil(n / max_points))
+            positions = np.append(positions[::step], n - 1) if (n - 1) % step else positions[::step]
+        return np.append(positions, 0)
+    if not keep.any():
+        return np.empty(0, dtype=np.int64)
+
+    # Putar urutan agar dimulai tepat setelah posisi yang tidak diambil, sehingga
+    # bagian yang melewati akhir tur (n-1 -> 0) tetap tersambung
+    start = (int(np.flatnonzero(~keep)[0]) + 1) % n
+    order = (np.arange(n) + start) % n
+    rotated = np.flatnonzero(keep[order])
+    run_start = np.concatenate(([True], np.diff(rotated) != 1))
+    run_end = np.concatenate((run_start[1:], [True]))
+
+    if len(rotated) > max_points:
+        step = int(np.ceil(len(rotated) / max_points))
+        sampled = (np.arange(len(rotated)) % step == 0) | run_start | run_end
+        rotated, run_start = rotated[sampled], run_start[sampled]
+
+    positions = order[rotated]
+    # Sisipkan -1 di antara bagian yang tidak bersambung
+    return np.insert(positions, np.flatnonzero(run_start[1:]) + 1, -1)
+
+# --- 3. Figure ---
+
+def _scatter_cls(num_points):
+    return go.Scattergl if num_points > WEBGL_THRESHOLD else go.Scatter
+
+def _city_trace(xs, ys, labels, num_total):
+    """Trace marker kota; label teks hanya untuk jumlah titik kecil."""
+    show_labels = len(xs) <= LABEL_THRESHOLD
+    large = num_total > WEBGL_THRESHOLD
+    return _scatter_cls(num_total)(
+        x=xs,
+        y=ys,
+        mode='markers+text' if show_labels else 'markers',
+        marker=dict(size=4 if large else 12, color='red'),
+        text=labels if show_labels else None,
+        hovertext=None if show_labels else labels,
+        textposition='top center',
+        name='Cities'
+    )
+
+def _apply_viewport(fig, viewport):
+    if viewport is not None:
+        (x_min, x_max), (y_min, y_max) = viewport
+        fig.update_xaxes(range=[x_min, x_max])
+        fig.update_yaxes(range=[y_min, y_max])
+
+def build_cities_figure(ids, xs, ys, max_points=DEFAULT_MAX_POINTS, viewport=None):
+    """Figure posisi kota dari array hasil cities_to_arrays."""
+    shown = downsample_points(xs, ys, max_points, viewport)
+
+    fig = go.Figure()
+    fig.add_trace(_city_trace(xs[shown], ys[shown], ids[shown], len(ids)))
+
+    title = "Posisi Kota"
+    if len(shown) < len(ids):
+        title += f" ({len(shown):,} dari {len(ids):,} titik ditampilkan)"
+    fig.update_layout(
+        title=title,
+        xaxis_title="X Coordinate",
+        yaxis_title="Y Coordinate",
+        hovermode='closest',
+        height=400
+    )
+    _apply_viewport(fig, viewport)
+    return fig
+
+def build_tour_figure(tour, ids, xs, ys, title, max_points=DEFAULT_MAX_POINTS, viewport=None):
+    """Figure rute (garis + kota + titik start) dari tur dan array hasil cities_to_arrays."""
+    tour_indices = tour_to_indices(tour, ids)
+    positions = downsample_tour(tour_indices, xs, ys, max_points, viewport)
+    gaps = positions < 0
+    line = tour_indices[np.where(gaps, 0, positions)]
+    shown = downsample_points(xs, ys, max_points, viewport)
+    scatter = _scatter_cls(len(tour_indices))
+
+    fig = go.Figure()
+    fig.add_trace(scatter(
+        x=np.where(gaps, np.nan, xs[line]),
+        y=np.where(gaps, np.nan, ys[line]),
+        mode='lines',
+        line=dict(color='blue', width=2 if len(tour_indices) <= WEBGL_THRESHOLD else 1),
+        connectgaps=False,
+        name='Route'
+    ))
+
+    fig.add_trace(_city_trace(xs[shown], ys[shown], ids[shown], len(tour_indices)))
+
+    start = tour_indices[0]
+    fig.add_trace(go.Scatter(
+        x=[xs[start]],
+        y=[ys[start]],
+        mode='markers',
+        marker=dict(size=20, color='green', symbol='star'),
+        name='Start/End'
+    ))
+
+    if len(shown) < len(tour_indices):
+        title += f" ({len(shown):,} dari {len(tour_indices):,} titik ditampilkan)"
+    fig.update_layout(
+        title=title,
+        xaxis_title="X Coordinate",
+        yaxis_title="Y Coordinate",
+        hovermode='closest',
+        height=500
+    )
+    _apply_viewport(fig, viewport)
+    return fig